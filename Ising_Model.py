@@ -7,16 +7,55 @@ from matplotlib.colors import ListedColormap
 from matplotlib import animation
 import copy
 import sys
+from profiling import progress, phase
 
-def progress(count, total, status=''):
-    bar_len = 60
-    filled_len = int(round(bar_len * count / float(total)))
+class FrameRecorder:
+    def __init__(self,path,buffer_size=100):
+        """
+        records frames of the lattice to disk while only holding a bounded number in memory
+
+        path: file to write the frames to
 
-    percents = round(100.0 * count / float(total), 1)
-    bar = '=' * filled_len + '-' * (bar_len - filled_len)
+        buffer_size: number of frames to hold in memory before they are written out
 
-    sys.stdout.write('[%s] %s%s ...%s\r' % (bar, percents, '%', status))
-    sys.stdout.flush()
+        frames are written as a sequence of int8 numpy arrays of shape (frames,ly,lx) and can be
+        read back with load_frames
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._file = open(path,'wb')
+        self.count = 0
+
+    def append(self,spins):
+        self._buffer.append(np.array(spins,dtype=np.int8))
+        self.count+=1
+        if(len(self._buffer)>=self.buffer_size):
+            self.flush()
+
+    def flush(self):
+        if(len(self._buffer)>0):
+            np.save(self._file,np.stack(self._buffer))
+            self._file.flush()
+            self._buffer = []
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def load_frames(path):
+    """
+    yields the frames written to path by a FrameRecorder one at a time
+    """
+    with open(path,'rb') as infile:
+        while True:
+            try:
+                chunk = np.load(infile)
+            except (EOFError,ValueError):
+                return
+            for frame in chunk:
+                yield frame
 
 class Lattice:
     def __init__(self,WIDTH:int,HEIGHT:int,T:float,INITIAL = "random"):
@@ -43,6 +82,10 @@ class Lattice:
         self.E = []
         self.M = []
         self.T = T
+        #extra observables measured alongside E and M (see attach)
+        self.observables = []
+        #optional profiling.Profile, timings and counters are only recorded if this is set
+        self.profile = None
         self.title = ""
         self.ID = random.random()
 
@@ -132,6 +175,8 @@ class Lattice:
         if(random.random()<p):
             #flip the spin based on the determined probability
             self._spins[y,x]*=-1
+            if self.profile is not None:
+                self.profile.accepted+=1
         return self._spins
 
     def glauber_sweep(self):
@@ -145,17 +190,25 @@ class Lattice:
         simulates the glauber method and caches the states
         """
         self.title = "Glauber"
-        for r in range(runs):
-            #progress(r,runs)
-            if cache:
-                self.glauber_sweep()
-                if(r%interval == 0):
-                    self.cache.append(copy.copy(self._spins))
-                    self.E.append(self.calc_total_energy())
-                    self.M.append(self.calc_total_magnetisation())
-            else:
-                self.glauber_sweep()
-        if cache:
+        with self.phase("sweeps" if cache else "equilibration"):
+            for r in range(runs):
+                #progress(r,runs)
+                if cache:
+                    self.glauber_sweep()
+                    if(r%interval == 0):
+                        self.cache.append(copy.copy(self._spins))
+                        with self.phase("energy"):
+                            self.E.append(self.calc_total_energy())
+                            self.M.append(self.calc_total_magnetisation())
+                        with self.phase("observables"):
+                            for observable in self.observables:
+                                observable.measure(self._spins)
+                else:
+                    self.glauber_sweep()
+        if self.profile is not None:
+            self.profile.count_sweeps(runs,self.size)
+        #the profile report shows its own progress line so don't write over it
+        if cache and self.profile is None:
             print(f"Completed Glauber temp {self.T}")
     
     def kawasaki_step(self):
@@ -166,10 +219,14 @@ class Lattice:
         spin1 = self._spins[y1,x1]
         #find a second random point with a different spin
         spin2=spin1
+        tries = 0
         while(spin2==spin1):
             x2 = random.randrange(self._X)
             y2 = random.randrange(self._Y)
             spin2=self._spins[y2,x2]
+            tries+=1
+        if self.profile is not None:
+            self.profile.partner_rejections+=tries-1
         #determine the change in energy
         dE = self.calc_delta_energy(x1,y1)+self.calc_delta_energy(x2,y2)
         #check if the two points are neighbours
@@ -181,6 +238,8 @@ class Lattice:
             #flip the spin based on the determined probability
             self._spins[y1,x1]*=-1
             self._spins[y2,x2]*=-1
+            if self.profile is not None:
+                self.profile.accepted+=1
         return self._spins
 
     def kawasaki_sweep(self):
@@ -194,19 +253,55 @@ class Lattice:
         simulates the kawasaki method and caches the states
         """
         self.title = "Kawasaki"
-        for r in range(runs):
-            #progress(r,runs)
-            if cache:
-                self.kawasaki_sweep()
-                if(r%interval==0):
-                    self.cache.append(copy.copy(self._spins))
-                    self.E.append(self.calc_total_energy())
-                    self.M.append(self.calc_total_magnetisation())
-            else:
-                self.kawasaki_sweep()
-        if cache:
+        with self.phase("sweeps" if cache else "equilibration"):
+            for r in range(runs):
+                #progress(r,runs)
+                if cache:
+                    self.kawasaki_sweep()
+                    if(r%interval==0):
+                        self.cache.append(copy.copy(self._spins))
+                        with self.phase("energy"):
+                            self.E.append(self.calc_total_energy())
+                            self.M.append(self.calc_total_magnetisation())
+                        with self.phase("observables"):
+                            for observable in self.observables:
+                                observable.measure(self._spins)
+                else:
+                    self.kawasaki_sweep()
+        if self.profile is not None:
+            self.profile.count_sweeps(runs,self.size)
+        if cache and self.profile is None:
             print(f"Completed Kawasaki temp {self.T}")
-        
+
+    def stream(self,method,runs=None,interval=1):
+        """
+        returns a generator which runs the dynamics on demand, yielding the state of the lattice
+        every interval sweeps
+
+        method: dynamics to use (g/glauber or k/kawasaki)
+
+        runs: total number of sweeps to perform, runs forever if None
+
+        interval: number of sweeps between each yielded state
+        """
+        if method.lower() == "g" or method.lower() == "glauber":
+            self.title = "Glauber"
+            sweep = self.glauber_sweep
+        elif method.lower() == "k" or method.lower() == "kawasaki":
+            self.title = "Kawasaki"
+            sweep = self.kawasaki_sweep
+        else:
+            raise ValueError("Please specify a valid model (g or k)")
+        return self._stream_sweeps(sweep,runs,interval)
+
+    def _stream_sweeps(self,sweep,runs,interval):
+        r = 0
+        while runs is None or r<runs:
+            sweep()
+            r+=1
+            if(r%interval == 0):
+                yield self._spins
+
     def calc_total_energy(self):
         """
         Calculates the total energy of the state
@@ -236,6 +331,20 @@ class Lattice:
     def get_measurements(self):
         return self.E,self.M
 
+    def phase(self,name):
+        """
+        returns a context manager timing the enclosed block as the given phase of the profile,
+        or one that does nothing if profiling is not enabled
+        """
+        return phase(self.profile,name)
+
+    def attach(self,observable):
+        """
+        attaches an observable (e.g. correlations.Correlations) which will be measured on every
+        cached sweep of sim_glauber and sim_kawasaki through its measure(spins) method
+        """
+        self.observables.append(observable)
+
     def draw(self,UP_COLOUR:list,DOWN_COLOUR:list):
         """
         Draws the lattice in its current state
@@ -266,6 +375,47 @@ class Lattice:
         else:
             print("Make sure to run a simulation first")
 
+    def anim_stream(self,UP_COLOUR:list,DOWN_COLOUR:list,method,runs=None,skip=1,record=None,buffer_size=100):
+        """
+        animates the lattice while the simulation is running rather than from the cache
+
+        method: dynamics to use (g/glauber or k/kawasaki)
+
+        runs: number of sweeps to animate for, runs until the window is closed if None
+
+        skip: number of sweeps between each drawn frame, larger lattices need a larger skip
+        to keep up with real time
+
+        record: optional file to record every drawn frame to (see FrameRecorder)
+
+        buffer_size: number of frames held in memory before being written to record
+        """
+        cols = ListedColormap(np.array([DOWN_COLOUR,UP_COLOUR]))
+        fig,ax = plt.subplots()
+        ax.axes.xaxis.set_visible(False)
+        ax.axes.yaxis.set_visible(False)
+        red_patch = mpatches.Patch(color='red', label='Spin Down')
+        blue_patch = mpatches.Patch(color='blue', label='Spin Up')
+        plt.legend(handles=[red_patch,blue_patch])
+        im = ax.imshow(self._spins,cmap=cols,vmin=-1,vmax=1)
+        frames = self.stream(method,runs,skip)
+        ax.set_title(self.title)
+        recorder = FrameRecorder(record,buffer_size) if record is not None else None
+        def animate(spins):
+            im.set_array(spins)
+            if recorder is not None:
+                recorder.append(spins)
+            return im,
+
+        #frames are pulled from the generator as they are needed so nothing is cached
+        a = animation.FuncAnimation(fig,animate,frames=frames,interval=1,blit=True,
+                                    cache_frame_data=False,repeat=False)
+        try:
+            plt.show()
+        finally:
+            if recorder is not None:
+                recorder.close()
+
 
 
 def main():
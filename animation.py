@@ -10,12 +10,19 @@ def main():
     sweeps = int(sys.argv[5])
     #instantiate a system at the given temperature and size
     L = Lattice(lx,ly,T)
+    if Dynamic.lower() not in ("g","k"):
+        raise ValueError("Please specify a valid model (g or k)")
+    if "-stream" in sys.argv[6:]:
+        #optional streaming arguments: -skip n draws every nth sweep, -record file saves the frames
+        skip = int(sys.argv[sys.argv.index("-skip")+1]) if "-skip" in sys.argv else 1
+        record = sys.argv[sys.argv.index("-record")+1] if "-record" in sys.argv else None
+        #a sweep count of 0 streams until the window is closed
+        L.anim_stream([0,0,1,1],[1,0,0,1],Dynamic,sweeps if sweeps>0 else None,skip,record)
+        return
     if Dynamic.lower()=="g":
         L.sim_glauber(sweeps,True,1)
     elif Dynamic.lower()=="k":
         L.sim_kawasaki(sweeps,True,1)
-    else:
-        raise ValueError("Please specify a valid model (g or k)")
     L.anim([0,0,1,1],[1,0,0,1],sweeps) #specify the colour for the up state and the down state
 
-main()
\ No newline at end of file
+main()
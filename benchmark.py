@@ -0,0 +1,131 @@
+from Ising_Model import Lattice
+from simulate import bootstrap, jacknife, capacity
+import numpy as np
+import json
+import sys
+import time
+import os
+
+#minimum time in seconds to spend calling the function in each repeat
+MIN_TIME = 0.2
+
+def best_time(func,repeats):
+    """
+    returns the shortest time in seconds per call of func over the given number of repeats, where
+    each repeat calls func until at least MIN_TIME seconds have passed
+    """
+    times = []
+    for _ in range(repeats):
+        calls = 0
+        t = time.perf_counter()
+        while True:
+            func()
+            calls+=1
+            elapsed = time.perf_counter()-t
+            if elapsed >= MIN_TIME:
+                break
+        times.append(elapsed/calls)
+    return min(times)
+
+def bench_dynamics(lx,ly,T,repeats):
+    """
+    returns the spin updates per second of a glauber and kawasaki sweep and the spins per second
+    of calculating the total energy for a lattice of the given size and temperature
+    """
+    N = lx*ly
+    results = {}
+    #equilibrate first so the acceptance rate is representative of the temperature
+    L = Lattice(lx,ly,T,"up")
+    L.sim_glauber(10)
+    results["glauber_sweep"] = N/best_time(L.glauber_sweep,repeats)
+    L = Lattice(lx,ly,T,"random")
+    L.sim_kawasaki(10)
+    results["kawasaki_sweep"] = N/best_time(L.kawasaki_sweep,repeats)
+    results["calc_total_energy"] = N/best_time(L.calc_total_energy,repeats)
+    return results
+
+def bench_statistics(n,repeats,k=1000):
+    """
+    returns the resampled measurements per second of bootstrap (k resamples) and jacknife for
+    n measurements
+    """
+    E = np.random.normal(-2000,50,n)
+    results = {}
+    results["bootstrap"] = k*n/best_time(lambda: bootstrap(E,capacity,k,2500,2),repeats)
+    results["jacknife"] = n*(n-1)/best_time(lambda: jacknife(E,capacity,2500,2),repeats)
+    return results
+
+def run(sizes,Ts,samples,repeats):
+    """
+    runs the benchmarks over every size and temperature for the dynamics and over every number
+    of samples for the statistics, returning a dictionary of benchmark name to throughput
+    """
+    results = {}
+    for lx,ly in sizes:
+        for T in Ts:
+            for name,rate in bench_dynamics(lx,ly,T,repeats).items():
+                results[f"{name} {lx}x{ly} T={T}"] = rate
+            print(f"Benchmarked {lx}x{ly} T={T}")
+    for n in samples:
+        for name,rate in bench_statistics(n,repeats).items():
+            results[f"{name} n={n}"] = rate
+        print(f"Benchmarked statistics n={n}")
+    return results
+
+def compare(results,baseline,tolerance):
+    """
+    returns the benchmarks whose throughput has dropped by more than tolerance (a fraction)
+    relative to the baseline, as a dictionary of name to (baseline, current, relative change)
+    """
+    regressions = {}
+    for name,rate in results.items():
+        if name not in baseline:
+            continue
+        change = (rate-baseline[name])/baseline[name]
+        if change < -tolerance:
+            regressions[name] = (baseline[name],rate,change)
+    return regressions
+
+def get_option(name,default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name)+1]
+    return default
+
+def main():
+    global MIN_TIME
+    sizes = [(int(x),int(x)) for x in get_option("-sizes","10,50").split(",")]
+    Ts = [float(x) for x in get_option("-Ts","1,2.27,3").split(",")]
+    samples = [int(x) for x in get_option("-samples","100,1000").split(",")]
+    repeats = int(get_option("-repeats",3))
+    out = get_option("-out","Benchmark.json")
+    baseline_file = get_option("-baseline",None)
+    tolerance = float(get_option("-tolerance",0.1))
+    MIN_TIME = float(get_option("-mintime",MIN_TIME))
+
+    baseline = None
+    if baseline_file is not None:
+        if os.path.abspath(baseline_file) == os.path.abspath(out):
+            raise ValueError(f"The output file {out} would overwrite the baseline, use -out to save elsewhere")
+        with open(baseline_file,'r') as infile:
+            baseline = json.load(infile)["results"]
+
+    results = run(sizes,Ts,samples,repeats)
+    benchmark = {"params": {"sizes": [f"{lx}x{ly}" for lx,ly in sizes],"T": Ts,"samples": samples,
+                            "repeats": repeats,"min_time": MIN_TIME},
+                 "results": results}
+    with open(out,'w') as outfile:
+        json.dump(benchmark,outfile,indent=1)
+    for name,rate in results.items():
+        print(f"{name}: {rate:.4g} /s")
+
+    if baseline is not None:
+        regressions = compare(results,baseline,tolerance)
+        if len(regressions) > 0:
+            print(f"{len(regressions)} regressions of more than {tolerance:.0%} against {baseline_file}:")
+            for name,(old,new,change) in regressions.items():
+                print(f"{name}: {old:.4g} /s -> {new:.4g} /s ({change:.1%})")
+            sys.exit(1)
+        print(f"No regressions of more than {tolerance:.0%} against {baseline_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import numpy as np
+
+class Correlations:
+    def __init__(self,WIDTH:int,HEIGHT:int):
+        """
+        FFT based spatial observables for a lattice of the given size. Each call to measure adds
+        a snapshot of the spins to running averages of the radially binned structure factor S(k)
+        and the connected spin-spin correlation function C(r), so no snapshots are stored.
+
+        WIDTH: int width of the grid
+
+        HEIGHT: height of the grid
+        """
+        self._X = WIDTH
+        self._Y = HEIGHT
+        self.N = WIDTH*HEIGHT
+        #distance of each site from the origin using periodic boundaries, binned to the nearest integer
+        dx = np.minimum(np.arange(WIDTH),WIDTH-np.arange(WIDTH))
+        dy = np.minimum(np.arange(HEIGHT),HEIGHT-np.arange(HEIGHT))
+        r = np.hypot(*np.meshgrid(dx,dy))
+        self._r_bins = np.rint(r).astype(int).ravel()
+        self._r_counts = np.bincount(self._r_bins)
+        #magnitude of each wavevector in the FFT, binned in steps of the smallest wavevector
+        kx = 2*np.pi*np.fft.fftfreq(WIDTH)
+        ky = 2*np.pi*np.fft.fftfreq(HEIGHT)
+        k = np.hypot(*np.meshgrid(kx,ky))
+        self.k_min = 2*np.pi/max(WIDTH,HEIGHT)
+        self._k_bins = np.rint(k/self.k_min).astype(int).ravel()
+        self._k_counts = np.bincount(self._k_bins)
+        self.r = (np.bincount(self._r_bins,r.ravel())/self._r_counts).tolist()
+        self.k = (np.bincount(self._k_bins,k.ravel())/self._k_counts).tolist()
+        #running sums of the binned observables
+        self._S_sum = np.zeros(len(self._k_counts))
+        self._C_sum = np.zeros(len(self._r_counts))
+        #S at k=0 and at the smallest non-zero wavevector, used for the correlation length
+        self._S0_sum = 0
+        self._S1_sum = 0
+        self.count = 0
+
+    def _structure_factor(self,spins):
+        #S(k) = |FFT(s)|^2/N
+        F = np.fft.fft2(spins)
+        return (F*np.conj(F)).real/self.N
+
+    def _second_moment_length(self,S0,S1):
+        """
+        second moment correlation length
+        xi = 1/(2sin(k_min/2))*sqrt(S(0)/S(k_min)-1)
+        returns None if S(k_min) is 0 (e.g. a fully ordered lattice) where the length diverges
+        """
+        if S1<=0:
+            return None
+        return float(np.sqrt(max(S0/S1-1,0))/(2*np.sin(self.k_min/2)))
+
+    def _S1(self,S):
+        #S at the smallest non-zero wavevector along each available axis
+        values = []
+        if self._X>1 and self._X>=self._Y:
+            values.append(S[0,1])
+        if self._Y>1 and self._Y>=self._X:
+            values.append(S[1,0])
+        return float(np.mean(values))
+
+    def measure(self,spins):
+        """
+        adds a snapshot of the lattice to the running averages
+        """
+        S = self._structure_factor(spins)
+        #the inverse transform of S(k) is the correlation <s_i s_i+r>, subtracting <s>^2 makes it connected
+        G = np.fft.ifft2(S).real
+        m = np.mean(spins)
+        self._S_sum += np.bincount(self._k_bins,S.ravel(),len(self._k_counts))
+        self._C_sum += np.bincount(self._r_bins,G.ravel()-m**2,len(self._r_counts))
+        self._S0_sum += float(S[0,0])
+        self._S1_sum += self._S1(S)
+        self.count+=1
+
+    @property
+    def structure_factor(self):
+        """running average of the radially binned structure factor S(k)"""
+        return (self._S_sum/self._k_counts/max(self.count,1)).tolist()
+
+    @property
+    def correlation_function(self):
+        """running average of the radially binned connected correlation function C(r)"""
+        return (self._C_sum/self._r_counts/max(self.count,1)).tolist()
+
+    @property
+    def correlation_length(self):
+        """
+        second moment correlation length of the averaged structure factor, None if nothing has
+        been measured or the length diverges
+        """
+        if self.count==0:
+            return None
+        return self._second_moment_length(self._S0_sum/self.count,self._S1_sum/self.count)
+
+    def get_measurements(self):
+        return {"k": self.k,
+                "S": self.structure_factor,
+                "r": self.r,
+                "C": self.correlation_function,
+                "xi": self.correlation_length}
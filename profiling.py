@@ -0,0 +1,124 @@
+from contextlib import contextmanager, nullcontext
+import json
+import sys
+import time
+
+def progress(count, total, status=''):
+    bar_len = 60
+    filled_len = int(round(bar_len * count / float(total)))
+
+    percents = round(100.0 * count / float(total), 1)
+    bar = '=' * filled_len + '-' * (bar_len - filled_len)
+
+    sys.stdout.write('[%s] %s%s ...%s\r' % (bar, percents, '%', status))
+    sys.stdout.flush()
+
+def phase(profile,name):
+    """
+    returns a context manager timing the enclosed block as a phase of profile, or one that does
+    nothing if profile is None
+    """
+    if profile is None:
+        return nullcontext()
+    return profile.phase(name)
+
+class Profile:
+    def __init__(self,T:float,method:str):
+        """
+        timings and counters for one lattice, filled in by the lattice while it is simulated and
+        sent back to the parent process with it
+
+        T: Temperature of the lattice
+
+        method: dynamics being profiled (Glauber or Kawasaki)
+        """
+        self.T = T
+        self.method = method
+        #exclusive time in seconds spent in each phase
+        self.phases = {}
+        self.sweeps = 0
+        self.attempts = 0
+        self.accepted = 0
+        self.partner_rejections = 0
+        self._stack = []
+
+    @contextmanager
+    def phase(self,name):
+        """
+        times the enclosed block as the given phase. Time spent in a nested phase is only counted
+        towards the nested phase
+        """
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter()-start
+            self._stack.pop()
+            self.phases[name] = self.phases.get(name,0)+elapsed
+            if len(self._stack) > 0:
+                parent = self._stack[-1]
+                self.phases[parent] = self.phases.get(parent,0)-elapsed
+
+    def count_sweeps(self,runs,N):
+        self.sweeps+=runs
+        self.attempts+=runs*N
+
+    @property
+    def acceptance_rate(self):
+        return self.accepted/self.attempts if self.attempts > 0 else 0
+
+    @property
+    def sweeps_per_second(self):
+        t = self.phases.get("equilibration",0)+self.phases.get("sweeps",0)
+        return self.sweeps/t if t > 0 else 0
+
+    def get_measurements(self):
+        return {"T": self.T,
+                "phases": self.phases,
+                "total": sum(self.phases.values()),
+                "sweeps": self.sweeps,
+                "sweeps_per_second": self.sweeps_per_second,
+                "acceptance_rate": self.acceptance_rate,
+                "partner_rejections": self.partner_rejections}
+
+class ProfileReport:
+    def __init__(self,total:int,method:str):
+        """
+        aggregates the profiles of every temperature as they are returned, showing the progress and
+        estimated time remaining of the whole scan
+
+        total: number of temperatures in the scan
+
+        method: dynamics being profiled (Glauber or Kawasaki)
+        """
+        self.total = total
+        self.method = method
+        self.profiles = []
+        self.start = time.perf_counter()
+
+    def add(self,profile:Profile):
+        self.profiles.append(profile)
+        done = len(self.profiles)
+        elapsed = time.perf_counter()-self.start
+        eta = elapsed/done*(self.total-done)
+        sweeps = sum(p.sweeps for p in self.profiles)
+        progress(done,self.total,f"{self.method} {done}/{self.total} {sweeps/elapsed:.1f} sweeps/s ETA {eta:.0f}s")
+        if done == self.total:
+            sys.stdout.write("\n")
+
+    def write(self,filename):
+        """
+        writes the per temperature profiles and the totals of each phase to filename
+        """
+        phases = {}
+        for profile in self.profiles:
+            for name,t in profile.phases.items():
+                phases[name] = phases.get(name,0)+t
+        report = {"params": {"method": self.method,"wall_time": time.perf_counter()-self.start},
+                  "totals": {"phases": phases,
+                             "sweeps": sum(p.sweeps for p in self.profiles),
+                             "partner_rejections": sum(p.partner_rejections for p in self.profiles)},
+                  "temperatures": {i: p.get_measurements() for i,p in enumerate(sorted(self.profiles,key=lambda p: p.T))}}
+        with open(filename,'w') as outfile:
+            json.dump(report,outfile)
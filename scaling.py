@@ -0,0 +1,132 @@
+from Ising_Model import Lattice
+from simulate import do_glauber
+import numpy as np
+import json
+import sys
+import concurrent.futures
+import time
+
+def parse_size(size: str):
+    """
+    returns (lx,ly) for a size given as either L (an LxL grid) or lxXly e.g. 20x10
+    """
+    if "x" in size.lower():
+        lx,ly = size.lower().split("x")
+        return int(lx),int(ly)
+    return int(size),int(size)
+
+def cost(lx,ly,runs):
+    """
+    estimated cost of a task, the number of spin updates including the 100 equilibration sweeps
+    """
+    return lx*ly*(runs+100)
+
+def binder(M):
+    """
+    returns the binder cumulant of the magnetisation measurements
+    U = 1 - <M^4>/(3<M^2>^2)
+    """
+    M = np.array(M,dtype=float)
+    M2 = np.mean(np.power(M,2))
+    M4 = np.mean(np.power(M,4))
+    if M2 == 0:
+        return float("nan")
+    return float(1-M4/(3*M2**2))
+
+def crossing(Ts,U1,U2):
+    """
+    returns the temperatures at which two binder cumulant curves cross, found by linear
+    interpolation between the temperatures either side of each change in sign of U1-U2
+    """
+    d = np.array(U1)-np.array(U2)
+    crossings = []
+    for i in range(len(Ts)-1):
+        if np.isnan(d[i]) or np.isnan(d[i+1]):
+            continue
+        if d[i] == 0:
+            crossings.append(Ts[i])
+        elif d[i]*d[i+1] < 0:
+            crossings.append(Ts[i]-d[i]*(Ts[i+1]-Ts[i])/(d[i+1]-d[i]))
+    #the loop only checks the start of each interval so check the final temperature as well
+    if len(Ts) > 0 and d[-1] == 0:
+        crossings.append(Ts[-1])
+    return crossings
+
+def estimate_Tc(Ts,binders):
+    """
+    estimates the critical temperature from the crossings of the binder cumulants of each pair
+    of consecutive sizes (sorted by number of spins)
+    binders: dictionary of size label to list of binder cumulants at each temperature
+    the error is the standard error of the crossings, None if there are fewer than 2
+    """
+    labels = list(binders.keys())
+    crossings = []
+    for a,b in zip(labels,labels[1:]):
+        crossings+=crossing(Ts,binders[a],binders[b])
+    if len(crossings) == 0:
+        return {"Tc": None,"Tc_error": None,"crossings": []}
+    Tc_error = None
+    if len(crossings) > 1:
+        Tc_error = float(np.std(crossings,ddof=1)/len(crossings)**0.5)
+    return {"Tc": float(np.mean(crossings)),
+            "Tc_error": Tc_error,
+            "crossings": [float(x) for x in crossings]}
+
+def finite_size_scaling(sizes,T0,Tf,NT,runs,tau):
+    """
+    runs glauber dynamics for every (size,T) pair in a single process pool, submitting the
+    most expensive tasks first so the largest lattices don't leave the pool idle at the end
+    sizes: list of (lx,ly)
+    """
+    Ts = np.linspace(T0,Tf,NT,False).tolist()
+    sizes = sorted(sizes,key=lambda s: s[0]*s[1])
+    tasks = [(lx,ly,i,T) for lx,ly in sizes for i,T in enumerate(Ts)]
+    tasks.sort(key=lambda task: cost(task[0],task[1],runs),reverse=True)
+    experiment = {"params": {"sizes": [f"{lx}x{ly}" for lx,ly in sizes],"T": Ts,"runs": runs,"tau": tau},
+                  "measurements": {f"{lx}x{ly}": {} for lx,ly in sizes}}
+
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        futures = {}
+        for lx,ly,i,T in tasks:
+            future = executor.submit(do_glauber,Lattice(lx,ly,T,"up"),runs,tau)
+            futures[future] = (lx,ly,i)
+        for n,future in enumerate(concurrent.futures.as_completed(futures)):
+            lx,ly,i = futures[future]
+            L = future.result()
+            M = np.absolute(L.get_measurements()[1])
+            experiment["measurements"][f"{lx}x{ly}"][i] = {"T": L.T,
+                                                            "M_mean": float(np.mean(M)),
+                                                            "M2_mean": float(np.mean(np.power(M,2))),
+                                                            "M4_mean": float(np.mean(np.power(M,4))),
+                                                            "U": binder(M)}
+            print(f"Finite size scaling: {n+1}/{len(tasks)}")
+    binders = {}
+    for label,measurements in experiment["measurements"].items():
+        #as_completed returns tasks out of order so put the measurements back in temperature order
+        experiment["measurements"][label] = dict(sorted(measurements.items()))
+        binders[label] = [x["U"] for x in experiment["measurements"][label].values()]
+    experiment["Critical Temperature"] = estimate_Tc(Ts,binders)
+    with open("Scaling_Data.json",'w') as outfile:
+        json.dump(experiment,outfile)
+    return experiment
+
+def main():
+    if(len(sys.argv[1:])!=6):
+        raise TypeError("Expected 6 positional arguments: sizes, T0, Tf, Ts, runs, tau")
+    sizes = [parse_size(x) for x in sys.argv[1].split(",")]
+    T0 = float(sys.argv[2])
+    Tf = float(sys.argv[3])
+    NT,runs,tau = [int(x) for x in sys.argv[4:7]]
+    t = time.perf_counter()
+    experiment = finite_size_scaling(sizes,T0,Tf,NT,runs,tau)
+    Tc = experiment["Critical Temperature"]
+    if Tc["Tc"] is None:
+        print("The binder cumulants did not cross, try a wider temperature range")
+    elif Tc["Tc_error"] is None:
+        print(f"Critical Temperature from binder crossing: {round(Tc['Tc'],3)} K (one crossing, no error estimate)")
+    else:
+        print(f"Critical Temperature from binder crossing: {round(Tc['Tc'],3)} +/- {round(Tc['Tc_error'],3)} K")
+    print(f"time to complete: {(time.perf_counter()-t)/60} minutes")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 from Ising_Model import Lattice
+from correlations import Correlations
+from profiling import Profile, ProfileReport, phase
 import copy
 import numpy as np
 import json
 import sys
 import concurrent.futures
-import itertools
 import time
+import pickle
 def equilibrate(states: Lattice,method: str):
     """
     returns a lattice that has been allowed to reach equilibrium (100 sweeps) using either
@@ -71,20 +73,36 @@ def jacknife(measurements,value,N,T):
     return (sum([(x-chi)**2 for chi in xs]))**0.5
     
 def do_glauber(L,runs,tau):
-    print(f"Begin Glauber temp {L.T}")
+    if L.profile is None:
+        print(f"Begin Glauber temp {L.T}")
     L = equilibrate(L,"glauber")
     L.sim_glauber(runs,True,tau)
+    if L.profile is not None:
+        #estimate of the time taken to send the results back to the parent process
+        with L.phase("pickle"):
+            pickle.dumps(L)
     return L
 
-def mp_glauber(lx,ly,T0,Tf,NT,runs,tau):
+def mp_glauber(lx,ly,T0,Tf,NT,runs,tau,correlations=False,profile=False):
     Ts = np.linspace(T0,Tf,NT,False).tolist()
     Ls = [Lattice(lx,ly,T,"up") for T in Ts]
+    if correlations:
+        for L in Ls:
+            L.attach(Correlations(lx,ly))
+    if profile:
+        report = ProfileReport(NT,"Glauber")
+        for L in Ls:
+            L.profile = Profile(L.T,"Glauber")
     experiment = {"params": {"N":lx*ly,"tau":tau},"measurements":{}}
 
     with concurrent.futures.ProcessPoolExecutor() as executor:
-        results = executor.map(do_glauber,Ls,itertools.repeat(runs,len(Ls)),itertools.repeat(tau,len(Ls)))
-        i=0
-        for L in results:
+        #collect the results as each temperature finishes so the profile progress isn't held up by slow ones
+        futures = {executor.submit(do_glauber,L,runs,tau): i for i,L in enumerate(Ls)}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            L = future.result()
+            if profile:
+                report.add(L.profile)
             E,M = L.get_measurements()
             E_mean = float(np.mean(E))
             E_square_mean = float(np.mean(np.power(E,2)))
@@ -94,10 +112,12 @@ def mp_glauber(lx,ly,T0,Tf,NT,runs,tau):
             chi = float(susceptibility(M_mean,M_square_mean,experiment["params"]["N"],L.T))
             E_error = error(E_mean,E_square_mean,experiment["params"]["N"])
             M_error = error(M_mean,M_square_mean,experiment["params"]["N"])
-            C_berror = bootstrap(E,capacity,1000,experiment["params"]["N"],L.T)
-            chi_berror = bootstrap(M,susceptibility,1000,experiment["params"]["N"],L.T)
-            C_jerror = jacknife(E,capacity,experiment["params"]["N"],L.T)
-            chi_jerror = jacknife(M,susceptibility,experiment["params"]["N"],L.T)
+            with L.phase("bootstrap"):
+                C_berror = bootstrap(E,capacity,1000,experiment["params"]["N"],L.T)
+                chi_berror = bootstrap(M,susceptibility,1000,experiment["params"]["N"],L.T)
+            with L.phase("jacknife"):
+                C_jerror = jacknife(E,capacity,experiment["params"]["N"],L.T)
+                chi_jerror = jacknife(M,susceptibility,experiment["params"]["N"],L.T)
             x = {"T": L.T,
              "E_mean": E_mean,
              "M_mean": M_mean,
@@ -109,28 +129,44 @@ def mp_glauber(lx,ly,T0,Tf,NT,runs,tau):
              "chi_berror":chi_berror,
              "C_jerror":C_jerror,
              "chi_jerror":chi_jerror}
+            if correlations:
+                x["correlations"] = L.observables[0].get_measurements()
             experiment['measurements'][i] = x
-            i+=1
+    #results arrive in the order they finish so put them back in temperature order
+    experiment['measurements'] = dict(sorted(experiment['measurements'].items()))
     with open("Glauber_Data.json",'w') as outfile:
         json.dump(experiment,outfile)
+    if profile:
+        report.write("Glauber_Profile.json")
 
     
 
-def glauber(lx,ly,T0,Tf,NT,runs,tau):
+def glauber(lx,ly,T0,Tf,NT,runs,tau,correlations=False,profile=False):
     Ts = np.linspace(T0,Tf,NT,False).tolist()
     experiment = {"params": {"N":lx*ly,"tau":tau},"measurements":{}}
+    profiles = [Profile(T,"Glauber") if profile else None for T in Ts]
+    if profile:
+        report = ProfileReport(NT,"Glauber")
     i=0
     for T in Ts:
         L = Lattice(lx,ly,T,"up")
+        if correlations:
+            L.attach(Correlations(lx,ly))
+        L.profile = profiles[i]
         L = equilibrate(L,"glauber")
         L.sim_glauber(runs,True,tau)
+        if profile:
+            report.add(L.profile)
         E,M = L.get_measurements()
         measurement = {"T":T,"E":np.array(E),"M":np.absolute(np.array(M))}
+        if correlations:
+            measurement["correlations"] = L.observables[0].get_measurements()
         experiment["measurements"][i] = measurement
         del L
         i+=1
-        print(f"Glauber: {i}/{NT}")
-    for measurement in experiment["measurements"].values():
+        if not profile:
+            print(f"Glauber: {i}/{NT}")
+    for i,measurement in experiment["measurements"].items():
         E = measurement["E"]
         E_mean = np.mean(E)
         E_square_mean = np.mean(np.power(E,2))
@@ -143,88 +179,131 @@ def glauber(lx,ly,T0,Tf,NT,runs,tau):
         measurement["chi"] = float(susceptibility(M_mean,M_square_mean,experiment["params"]["N"],measurement["T"]))
         measurement["E_error"] = error(E_mean,E_square_mean,experiment["params"]["N"])
         measurement["M_error"] = error(M_mean,M_square_mean,experiment["params"]["N"])
-        measurement["C_berror"]=bootstrap(E,capacity,1000,experiment["params"]["N"],measurement["T"])
-        measurement["chi_berror"]=bootstrap(M,susceptibility,1000,experiment["params"]["N"],measurement["T"])
-        measurement["C_jerror"]=jacknife(E,capacity,experiment["params"]["N"],measurement["T"])
-        measurement["chi_jerror"]=jacknife(M,susceptibility,experiment["params"]["N"],measurement["T"])
+        with phase(profiles[i],"bootstrap"):
+            measurement["C_berror"]=bootstrap(E,capacity,1000,experiment["params"]["N"],measurement["T"])
+            measurement["chi_berror"]=bootstrap(M,susceptibility,1000,experiment["params"]["N"],measurement["T"])
+        with phase(profiles[i],"jacknife"):
+            measurement["C_jerror"]=jacknife(E,capacity,experiment["params"]["N"],measurement["T"])
+            measurement["chi_jerror"]=jacknife(M,susceptibility,experiment["params"]["N"],measurement["T"])
         del measurement["E"]
         del measurement["M"]
 
     with open("Glauber_Data.json",'w') as outfile:
         json.dump(experiment,outfile)
+    if profile:
+        report.write("Glauber_Profile.json")
 
 def do_kawasaki(L,runs,tau):
-    print(f"Begin Kawasaki temp {L.T}")
+    if L.profile is None:
+        print(f"Begin Kawasaki temp {L.T}")
     L = equilibrate(L,"kawasaki")
     L.sim_kawasaki(runs,True,tau)
+    if L.profile is not None:
+        #estimate of the time taken to send the results back to the parent process
+        with L.phase("pickle"):
+            pickle.dumps(L)
     return L
 
-def mp_kawasaki(lx,ly,T0,Tf,NT,runs,tau):
+def mp_kawasaki(lx,ly,T0,Tf,NT,runs,tau,correlations=False,profile=False):
     Ts = np.linspace(T0,Tf,NT,False).tolist()
     Ls = [Lattice(lx,ly,T) for T in Ts]
+    if correlations:
+        for L in Ls:
+            L.attach(Correlations(lx,ly))
+    if profile:
+        report = ProfileReport(NT,"Kawasaki")
+        for L in Ls:
+            L.profile = Profile(L.T,"Kawasaki")
     experiment = {"params": {"N":lx*ly,"tau":tau},"measurements":{}}
 
     with concurrent.futures.ProcessPoolExecutor() as executor:
-        results = executor.map(do_kawasaki,Ls,itertools.repeat(runs,len(Ls)),itertools.repeat(tau,len(Ls)))
-        i=0
-        for L in results:
+        futures = {executor.submit(do_kawasaki,L,runs,tau): i for i,L in enumerate(Ls)}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            L = future.result()
+            if profile:
+                report.add(L.profile)
             E = L.get_measurements()[0]
             E_mean = float(np.mean(E))
             E_square_mean = float(np.mean(np.power(E,2)))
             C = float(capacity(E_mean,E_square_mean,experiment["params"]["N"],L.T))
             E_error = error(E_mean,E_square_mean,experiment["params"]["N"])
-            C_berror = bootstrap(E,capacity,1000,experiment["params"]["N"],L.T)
-            C_jerror = jacknife(E,capacity,experiment["params"]["N"],L.T)
+            with L.phase("bootstrap"):
+                C_berror = bootstrap(E,capacity,1000,experiment["params"]["N"],L.T)
+            with L.phase("jacknife"):
+                C_jerror = jacknife(E,capacity,experiment["params"]["N"],L.T)
             x = {"T": L.T,
              "E_mean": E_mean,
              "C":C,
              "E_error":E_error,
              "C_berror":C_berror,
              "C_jerror":C_jerror,}
+            if correlations:
+                x["correlations"] = L.observables[0].get_measurements()
             experiment['measurements'][i] = x
-            i+=1
+    #results arrive in the order they finish so put them back in temperature order
+    experiment['measurements'] = dict(sorted(experiment['measurements'].items()))
     with open("Kawasaki_Data.json",'w') as outfile:
         json.dump(experiment,outfile)
+    if profile:
+        report.write("Kawasaki_Profile.json")
 
-def kawasaki(lx,ly,T0,Tf,NT,runs,tau):
+def kawasaki(lx,ly,T0,Tf,NT,runs,tau,correlations=False,profile=False):
     Ts = np.linspace(T0,Tf,NT,False).tolist()
     experiment = {"params": {"N":lx*ly,"tau":tau},"measurements":{}}
+    profiles = [Profile(T,"Kawasaki") if profile else None for T in Ts]
+    if profile:
+        report = ProfileReport(NT,"Kawasaki")
     i=0
     for T in Ts:
         L = Lattice(lx,ly,T,"random")
+        if correlations:
+            L.attach(Correlations(lx,ly))
+        L.profile = profiles[i]
         L = equilibrate(L,"kawasaki")
         L.sim_kawasaki(runs,True,tau)
+        if profile:
+            report.add(L.profile)
         E= L.get_measurements()[0]
         measurement = {"T":T,"E":np.array(E)}
+        if correlations:
+            measurement["correlations"] = L.observables[0].get_measurements()
         experiment["measurements"][i] = measurement
         del L
         i+=1
-        print(f"Kawasaki: {i}/{NT}")
-    for measurement in experiment["measurements"].values():
+        if not profile:
+            print(f"Kawasaki: {i}/{NT}")
+    for i,measurement in experiment["measurements"].items():
         E = measurement["E"]
         E_mean = np.mean(E)
         E_square_mean = np.mean(np.power(E,2))
         measurement["E_mean"] = float(E_mean)
         measurement["C"] = float(capacity(E_mean,E_square_mean,experiment["params"]["N"],measurement["T"]))
         measurement["E_error"] = error(E_mean,E_square_mean,experiment["params"]["N"])
-        measurement["C_berror"]=bootstrap(E,capacity,1000,experiment["params"]["N"],measurement["T"])
-        measurement["C_jerror"]=jacknife(E,capacity,experiment["params"]["N"],measurement["T"])
+        with phase(profiles[i],"bootstrap"):
+            measurement["C_berror"]=bootstrap(E,capacity,1000,experiment["params"]["N"],measurement["T"])
+        with phase(profiles[i],"jacknife"):
+            measurement["C_jerror"]=jacknife(E,capacity,experiment["params"]["N"],measurement["T"])
         del measurement["E"]
     with open("Kawasaki_Data.json",'w') as outfile:
         json.dump(experiment,outfile)
+    if profile:
+        report.write("Kawasaki_Profile.json")
     
 
 def main():
-    try: 
-        if(sys.argv[8] == "-nomulti"):
-            t = time.perf_counter()
-            glauber(*[int(x) for x in sys.argv[1:8]])
-            kawasaki(*[int(x) for x in sys.argv[1:8]])
-            print(f"time to complete: {(time.perf_counter()-t)/60} minutes (which is {(time.perf_counter()-t)/3600} hours)")
-    except:
+    params = [int(x) for x in sys.argv[1:8]]
+    correlations = "-corr" in sys.argv[8:]
+    profile = "-profile" in sys.argv[8:]
+    if "-nomulti" in sys.argv[8:]:
         t = time.perf_counter()
-        mp_glauber(*[int(x) for x in sys.argv[1:8]])
-        mp_kawasaki(*[int(x) for x in sys.argv[1:8]])
+        glauber(*params,correlations,profile)
+        kawasaki(*params,correlations,profile)
+        print(f"time to complete: {(time.perf_counter()-t)/60} minutes (which is {(time.perf_counter()-t)/3600} hours)")
+    else:
+        t = time.perf_counter()
+        mp_glauber(*params,correlations,profile)
+        mp_kawasaki(*params,correlations,profile)
         print(f"time to complete: {(time.perf_counter()-t)/60} minutes (which is {(time.perf_counter()-t)/3600} hours)")
 
 if __name__ == "__main__":